@@ -0,0 +1,38 @@
+# Gunicorn configuration file
+import os
+
+# Server socket
+bind = "127.0.0.1:5000"
+
+# Worker processes
+cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+workers = 2 * cpus + 1
+worker_class = "gthread"
+threads = 4
+timeout = 60
+keepalive = 75
+
+# Restart workers after this many requests, to help prevent memory leaks
+max_requests = 1000
+max_requests_jitter = 100
+
+# Logging
+accesslog = "-"
+errorlog = "-"
+loglevel = "info"
+
+# Process naming
+proc_name = 'trading_journal_app'
+
+# Server mechanics
+# Build the app once in the master and fork it into the workers
+preload_app = True
+
+
+def post_fork(server, worker):
+    """Drop DB connections inherited from the master so workers never share sockets."""
+    from wsgi import application
+    from journal.extensions import db
+
+    with application.app_context():
+        db.engine.dispose(close=False)
@@ -41,6 +41,11 @@ def create_app(config_object='journal.config.DevelopmentConfig'):
     app.register_blueprint(plan_generation_bp, url_prefix='/api')
     app.register_blueprint(account_bp, url_prefix='/api/accounts')
 
+    @app.route('/health')
+    def health_check():
+        """Health check endpoint for service monitoring."""
+        return jsonify({'status': 'healthy', 'service': 'journal_service'}), 200
+
     @app.route('/', defaults={'path': ''})
     @app.route('/<path:path>')
     def serve(path):
@@ -0,0 +1,21 @@
+# Gunicorn configuration file for the journal service
+
+# Server socket
+bind = "0.0.0.0:5000"
+
+# Worker processes
+# Flask-SocketIO needs a single gevent worker unless a sticky-session
+# load balancer sits in front
+workers = 1
+worker_class = "gevent"
+worker_connections = 1000
+timeout = 30
+keepalive = 5
+
+# Logging
+accesslog = "-"
+errorlog = "-"
+loglevel = "info"
+
+# Process naming
+proc_name = 'journal_service'
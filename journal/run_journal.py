@@ -1,17 +1,26 @@
-from journal import create_app, socketio
-from flask import jsonify
+import os
+from journal import create_app
 
-app = create_app()
-
-@app.route('/health')
-def health_check():
-    """Health check endpoint for service monitoring."""
-    return jsonify({'status': 'healthy', 'service': 'journal_service'}), 200
-
-if __name__ == '__main__':
+def main():
     try:
+        project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         print("Starting Journal Service on port 5000...")
-        socketio.run(app, debug=True, host='0.0.0.0', port=5000)
+        # Hand the process over to Gunicorn; SocketIO requires a single gevent worker
+        os.execvp('gunicorn', [
+            'gunicorn',
+            '--chdir', project_dir,
+            '-c', os.path.join(project_dir, 'journal', 'gunicorn.conf.py'),
+            '-k', 'gevent',
+            '-w', '1',
+            'journal.run_journal:app',
+        ])
     except Exception as e:
         print(f"Failed to start Journal Service: {e}")
         raise
+
+if __name__ == '__main__':
+    main()
+
+# Only reached when Gunicorn imports journal.run_journal:app; the launcher
+# above has already exec'd, so the app is never built just to be discarded
+app = create_app()
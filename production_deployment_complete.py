@@ -9,8 +9,233 @@ import subprocess
 import sys
 import shutil
 import json
+import gzip
+import functools
+import tempfile
 from pathlib import Path
 
+COMPRESSIBLE_SUFFIXES = {'.html', '.js', '.css', '.json', '.svg', '.txt', '.map'}
+
+# Templates for the files written by create_production_files()
+WSGI_TEMPLATE = '''#!/usr/bin/env python3
+"""
+WSGI file for Trading Journal Flask App
+"""
+import os
+import sys
+from pathlib import Path
+
+# Add the project directory to Python path
+project_dir = Path(__file__).parent
+sys.path.insert(0, str(project_dir))
+
+# Load environment variables
+from dotenv import load_dotenv
+load_dotenv('.env')
+
+# Set Flask environment
+os.environ['FLASK_ENV'] = 'production'
+
+# Import the application
+from journal import create_production_app
+
+application = create_production_app()
+
+if __name__ == "__main__":
+    application.run(host='0.0.0.0', port=5000)
+'''
+
+GUNICORN_CONF_TEMPLATE = '''# Gunicorn configuration file
+import os
+
+# Server socket
+bind = "127.0.0.1:5000"
+
+# Worker processes
+cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+workers = 2 * cpus + 1
+worker_class = "gthread"
+threads = 4
+timeout = 60
+keepalive = 75
+
+# Restart workers after this many requests, to help prevent memory leaks
+max_requests = 1000
+max_requests_jitter = 100
+
+# Logging
+accesslog = "-"
+errorlog = "-"
+loglevel = "info"
+
+# Process naming
+proc_name = 'trading_journal_app'
+
+# Server mechanics
+# Build the app once in the master and fork it into the workers
+preload_app = True
+
+
+def post_fork(server, worker):
+    """Drop DB connections inherited from the master so workers never share sockets."""
+    from wsgi import application
+    from journal.extensions import db
+
+    with application.app_context():
+        db.engine.dispose(close=False)
+'''
+
+RUN_PRODUCTION_TEMPLATE = '''#!/usr/bin/env python3
+"""
+Production runner for Trading Journal Flask App
+"""
+import os
+from pathlib import Path
+
+project_dir = Path(__file__).resolve().parent
+
+# Load environment variables
+from dotenv import load_dotenv
+load_dotenv('.env')
+
+# Set Flask environment
+os.environ['FLASK_ENV'] = 'production'
+
+if __name__ == "__main__":
+    print("🚀 Starting Trading Journal in Production Mode...")
+    print("📊 Dashboard will be available at: http://localhost:5000")
+    print("🔐 Admin MPIN: 180623")
+    print("⚡ Press Ctrl+C to stop the server")
+
+    # Replace this process with Gunicorn. Workers, threads, preload and the
+    # post_fork hook all come from gunicorn.conf.py; it is passed explicitly
+    # because Gunicorn only auto-loads it from the launch directory.
+    # Gunicorn imports wsgi:application itself, so nothing is built here and
+    # no idle Python parent is left behind.
+    argv = [
+        "gunicorn",
+        "-c", str(project_dir / "gunicorn.conf.py"),
+        "--chdir", str(project_dir),
+        "--bind", "0.0.0.0:5000",
+        "wsgi:application",
+    ]
+    os.execvp(argv[0], argv)
+'''
+
+SYSTEMD_SERVICE_TEMPLATE = '''[Unit]
+Description=Trading Journal Flask App
+After=network.target
+
+[Service]
+Type=exec
+User=www-data
+Group=www-data
+WorkingDirectory=/path/to/your/app
+Environment=PATH=/path/to/your/app/venv/bin
+EnvironmentFile=/path/to/your/app/.env
+ExecStart=/path/to/your/app/venv/bin/gunicorn -c /path/to/your/app/gunicorn.conf.py wsgi:application
+Restart=always
+
+[Install]
+WantedBy=multi-user.target
+'''
+
+NGINX_TEMPLATE = '''# Pooled keep-alive connections to Gunicorn
+upstream journal_backend {
+    server 127.0.0.1:5000;
+    keepalive 64;
+    keepalive_requests 10000;
+    keepalive_timeout 60s;
+}
+
+server {
+    listen 80;
+    server_name your-domain.com;
+    
+    # Built React app is served by nginx, never by Flask
+    root /path/to/your/app/dist;
+    
+    # Zero-copy file serving and compression
+    sendfile on;
+    tcp_nopush on;
+    tcp_nodelay on;
+    gzip on;
+    gzip_vary on;
+    gzip_min_length 1024;
+    gzip_types text/css application/javascript application/json image/svg+xml;
+    gzip_static on;
+    
+    # Requires ngx_brotli; uncomment if the module is installed
+    # brotli on;
+    # brotli_static on;
+    # brotli_types text/css application/javascript application/json image/svg+xml;
+    
+    # Vite's content-hashed build output; unhashed files copied from
+    # public/ fall through to the default location
+    location ^~ /assets/ {
+        add_header Cache-Control "public, max-age=31536000, immutable";
+        access_log off;
+    }
+    
+    # API routes
+    location /api/ {
+        proxy_pass http://journal_backend;
+        proxy_http_version 1.1;
+        proxy_set_header Connection "";
+        proxy_set_header Host $host;
+        proxy_set_header X-Real-IP $remote_addr;
+        proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
+        proxy_set_header X-Forwarded-Proto $scheme;
+        
+        # Answer preflight requests here so they never reach Flask;
+        # CORS headers on actual responses come from Flask-CORS
+        if ($request_method = 'OPTIONS') {
+            add_header Access-Control-Allow-Origin * always;
+            add_header Access-Control-Allow-Methods "GET, POST, OPTIONS, PUT, DELETE" always;
+            add_header Access-Control-Allow-Headers "DNT,User-Agent,X-Requested-With,If-Modified-Since,Cache-Control,Content-Type,Range,Authorization" always;
+            add_header Access-Control-Max-Age 86400 always;
+            add_header Content-Type 'text/plain; charset=utf-8';
+            add_header Content-Length 0;
+            return 204;
+        }
+    }
+    
+    # WebSocket / long-polling for Flask-SocketIO
+    location /socket.io/ {
+        proxy_pass http://journal_backend;
+        proxy_http_version 1.1;
+        proxy_set_header Upgrade $http_upgrade;
+        proxy_set_header Connection "upgrade";
+        proxy_set_header Host $host;
+        proxy_set_header X-Real-IP $remote_addr;
+        proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
+        proxy_set_header X-Forwarded-Proto $scheme;
+    }
+    
+    # Liveness probe answered by nginx itself; never wakes a Gunicorn worker
+    location = /health {
+        access_log off;
+        default_type application/json;
+        return 200 '{"status":"healthy","service":"journal_service"}';
+    }
+    
+    # Readiness probe that goes through to Flask's /health
+    location = /ready {
+        access_log off;
+        proxy_pass http://journal_backend/health;
+        proxy_http_version 1.1;
+        proxy_set_header Connection "";
+        proxy_connect_timeout 1s;
+    }
+    
+    # All other routes (SPA routing)
+    location / {
+        try_files $uri $uri/ /index.html;
+        expires 1h;
+    }
+}
+'''
+
 def print_header(title):
     """Print a formatted header"""
     print("\n" + "=" * 60)
@@ -22,18 +247,26 @@ def print_step(step, description):
     print(f"\n📋 Step {step}: {description}")
     print("-" * 40)
 
+@functools.lru_cache(maxsize=None)
+def _exists(path):
+    """Cached Path.exists(); call _exists.cache_clear() after creating files"""
+    return Path(path).exists()
+
 def run_command(command, description, check=True):
-    """Run a command with error handling"""
+    """Run a command (an argv list, no shell) with error handling
+
+    Output streams straight to the terminal rather than being buffered.
+    """
     print(f"🔧 {description}...")
     try:
-        result = subprocess.run(command, shell=True, check=check, capture_output=True, text=True)
-        if result.stdout:
-            print(f"✅ {result.stdout.strip()}")
+        subprocess.run(command, check=check)
         return True
     except subprocess.CalledProcessError as e:
         print(f"❌ Error: {e}")
-        if e.stderr:
-            print(f"Error details: {e.stderr}")
+        return False
+    except FileNotFoundError as e:
+        # Without a shell, a missing executable raises instead of exiting 127
+        print(f"❌ Error: {e}")
         return False
 
 def setup_environment():
@@ -42,7 +275,7 @@ def setup_environment():
     
     # Create .env.production if it doesn't exist
     env_prod_path = Path('.env.production')
-    if not env_prod_path.exists():
+    if not _exists('.env.production'):
         env_content = """# Production Environment Variables
 SECRET_KEY=your_super_secret_production_key_change_this
 JWT_SECRET_KEY=your_jwt_secret_production_key_change_this
@@ -60,12 +293,13 @@ ADMIN_PASSWORD_HASH=pbkdf2:sha256:260000$your_hash_here
 """
         with open(env_prod_path, 'w') as f:
             f.write(env_content)
+        _exists.cache_clear()
         print("✅ Created .env.production file")
     else:
         print("✅ .env.production already exists")
     
     # Copy to .env for production use
-    if env_prod_path.exists():
+    if _exists('.env.production'):
         shutil.copy('.env.production', '.env')
         print("✅ Copied .env.production to .env")
     
@@ -91,13 +325,23 @@ def install_dependencies():
         'marshmallow'
     ]
     
-    for dep in python_deps:
-        if not run_command(f"{sys.executable} -m pip install {dep}", f"Installing {dep}"):
-            print(f"⚠️  Failed to install {dep}, continuing...")
+    # Resolve and install everything in a single pip run
+    with tempfile.NamedTemporaryFile('w', prefix='requirements.production.', suffix='.txt', delete=False) as f:
+        f.write('\n'.join(python_deps) + '\n')
+    try:
+        pip_install = [
+            sys.executable, "-m", "pip", "install",
+            "--disable-pip-version-check", "--no-input", "--prefer-binary",
+            "-r", f.name,
+        ]
+        if not run_command(pip_install, "Installing Python dependencies"):
+            print("⚠️  Failed to install Python dependencies, continuing...")
+    finally:
+        os.unlink(f.name)
     
     # Node.js dependencies
-    if Path('package.json').exists():
-        if not run_command("npm install", "Installing Node.js dependencies"):
+    if _exists('package.json'):
+        if not run_command(["npm", "install", "--no-audit", "--no-fund", "--prefer-offline"], "Installing Node.js dependencies"):
             print("⚠️  Failed to install Node.js dependencies")
             return False
     
@@ -108,23 +352,46 @@ def build_frontend():
     """Build the React frontend"""
     print_step(3, "Building React frontend")
     
-    if not Path('package.json').exists():
+    if not _exists('package.json'):
         print("❌ package.json not found")
         return False
     
     # Build the frontend
-    if not run_command("npm run build", "Building React application"):
+    if not run_command(["npm", "run", "build"], "Building React application"):
         print("❌ Failed to build frontend")
         return False
     
     # Verify dist folder exists
-    if Path('dist').exists():
+    _exists.cache_clear()
+    if _exists('dist'):
         print("✅ Frontend built successfully - dist folder created")
+        precompress_assets('dist')
         return True
     else:
         print("❌ Build completed but dist folder not found")
         return False
 
+def precompress_assets(dist_dir):
+    """Write .gz (and .br, if brotli is installed) siblings for nginx's *_static"""
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+    
+    count = 0
+    for path in Path(dist_dir).rglob('*'):
+        if not path.is_file() or path.suffix not in COMPRESSIBLE_SUFFIXES:
+            continue
+        data = path.read_bytes()
+        if len(data) < 1024:
+            continue
+        path.with_name(path.name + '.gz').write_bytes(gzip.compress(data, compresslevel=9))
+        if brotli:
+            path.with_name(path.name + '.br').write_bytes(brotli.compress(data))
+        count += 1
+    
+    print(f"✅ Pre-compressed {count} assets{' (gzip + brotli)' if brotli else ' (gzip)'}")
+
 def setup_database():
     """Setup production database"""
     print_step(4, "Setting up production database")
@@ -135,165 +402,56 @@ def setup_database():
     print("✅ Instance directory created")
     
     # Run database creation if script exists
-    if Path('create_db.py').exists():
-        if run_command(f"{sys.executable} create_db.py", "Creating database tables"):
+    if _exists('create_db.py'):
+        # Import and run it in-process rather than booting a second interpreter
+        print("🔧 Creating database tables...")
+        try:
+            import create_db
+            create_db.setup_database()
             print("✅ Database tables created")
-        else:
+        except (Exception, SystemExit) as e:
+            print(f"❌ Error: {e}")
             print("⚠️  Database creation script failed, but continuing...")
     else:
         print("⚠️  create_db.py not found, skipping database setup")
     
+    # instance/ and the database file now exist
+    _exists.cache_clear()
+    return True
+
+def write_if_changed(path, content):
+    """Atomically replace path with content; skip the write if it is already up to date"""
+    path = Path(path)
+    data = content.encode()
+    if path.exists() and path.read_bytes() == data:
+        return False
+    
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
     return True
 
 def create_production_files():
     """Create production deployment files"""
     print_step(5, "Creating production deployment files")
     
-    # Create wsgi.py
-    wsgi_content = '''#!/usr/bin/env python3
-"""
-WSGI file for Trading Journal Flask App
-"""
-import os
-import sys
-from pathlib import Path
-
-# Add the project directory to Python path
-project_dir = Path(__file__).parent
-sys.path.insert(0, str(project_dir))
-
-# Load environment variables
-from dotenv import load_dotenv
-load_dotenv('.env')
-
-# Set Flask environment
-os.environ['FLASK_ENV'] = 'production'
-
-# Import the application
-from journal import create_production_app
-
-application = create_production_app()
-
-if __name__ == "__main__":
-    application.run(host='0.0.0.0', port=5000)
-'''
-    
-    with open('wsgi.py', 'w') as f:
-        f.write(wsgi_content)
-    print("✅ Created wsgi.py")
-    
-    # Create run_production.py
-    run_prod_content = '''#!/usr/bin/env python3
-"""
-Production runner for Trading Journal Flask App
-"""
-import os
-import sys
-from pathlib import Path
-
-# Add the project directory to Python path
-project_dir = Path(__file__).parent
-sys.path.insert(0, str(project_dir))
-
-# Load environment variables
-from dotenv import load_dotenv
-load_dotenv('.env')
-
-# Set Flask environment
-os.environ['FLASK_ENV'] = 'production'
-
-# Import and run the application
-from journal import create_production_app
-
-app = create_production_app()
-
-if __name__ == "__main__":
-    print("🚀 Starting Trading Journal in Production Mode...")
-    print("📊 Dashboard will be available at: http://localhost:5000")
-    print("🔐 Admin MPIN: 180623")
-    print("⚡ Press Ctrl+C to stop the server")
-    app.run(host='0.0.0.0', port=5000, debug=False)
-'''
+    files = [
+        ('wsgi.py', WSGI_TEMPLATE),
+        ('gunicorn.conf.py', GUNICORN_CONF_TEMPLATE),
+        ('run_production.py', RUN_PRODUCTION_TEMPLATE),
+        ('trading-journal.service', SYSTEMD_SERVICE_TEMPLATE),
+        ('nginx-trading-journal.conf', NGINX_TEMPLATE),
+    ]
     
-    with open('run_production.py', 'w') as f:
-        f.write(run_prod_content)
+    for filename, template in files:
+        if write_if_changed(filename, template):
+            print(f"✅ Created {filename}")
+        else:
+            print(f"✅ {filename} already up to date")
     os.chmod('run_production.py', 0o755)
-    print("✅ Created run_production.py")
-    
-    # Create systemd service file
-    service_content = '''[Unit]
-Description=Trading Journal Flask App
-After=network.target
-
-[Service]
-Type=exec
-User=www-data
-Group=www-data
-WorkingDirectory=/path/to/your/app
-Environment=PATH=/path/to/your/app/venv/bin
-EnvironmentFile=/path/to/your/app/.env
-ExecStart=/path/to/your/app/venv/bin/gunicorn --bind 127.0.0.1:5000 --workers 4 wsgi:application
-Restart=always
-
-[Install]
-WantedBy=multi-user.target
-'''
-    
-    with open('trading-journal.service', 'w') as f:
-        f.write(service_content)
-    print("✅ Created trading-journal.service")
-    
-    # Create nginx configuration
-    nginx_content = '''server {
-    listen 80;
-    server_name your-domain.com;
-    
-    # Serve static files directly
-    location /static/ {
-        alias /path/to/your/app/dist/;
-        expires 1y;
-        add_header Cache-Control "public, immutable";
-    }
-    
-    # API routes
-    location /api/ {
-        proxy_pass http://127.0.0.1:5000;
-        proxy_set_header Host $host;
-        proxy_set_header X-Real-IP $remote_addr;
-        proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
-        proxy_set_header X-Forwarded-Proto $scheme;
-        
-        # CORS headers
-        add_header Access-Control-Allow-Origin *;
-        add_header Access-Control-Allow-Methods "GET, POST, OPTIONS, PUT, DELETE";
-        add_header Access-Control-Allow-Headers "DNT,User-Agent,X-Requested-With,If-Modified-Since,Cache-Control,Content-Type,Range,Authorization";
-        
-        # Handle preflight requests
-        if ($request_method = 'OPTIONS') {
-            add_header Access-Control-Allow-Origin *;
-            add_header Access-Control-Allow-Methods "GET, POST, OPTIONS, PUT, DELETE";
-            add_header Access-Control-Allow-Headers "DNT,User-Agent,X-Requested-With,If-Modified-Since,Cache-Control,Content-Type,Range,Authorization";
-            add_header Access-Control-Max-Age 1728000;
-            add_header Content-Type 'text/plain; charset=utf-8';
-            add_header Content-Length 0;
-            return 204;
-        }
-    }
-    
-    # All other routes (SPA routing)
-    location / {
-        proxy_pass http://127.0.0.1:5000;
-        proxy_set_header Host $host;
-        proxy_set_header X-Real-IP $remote_addr;
-        proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
-        proxy_set_header X-Forwarded-Proto $scheme;
-    }
-}
-'''
-    
-    with open('nginx-trading-journal.conf', 'w') as f:
-        f.write(nginx_content)
-    print("✅ Created nginx-trading-journal.conf")
     
     return True
 
@@ -663,11 +821,12 @@ def main():
         
         print("\n🔧 Quick Commands:")
         print("   Local test:    ./start_production.sh")
-        print("   Production:    gunicorn --bind 0.0.0.0:5000 wsgi:application")
-        print("   With workers:  gunicorn --bind 0.0.0.0:5000 --workers 4 wsgi:application")
+        print("   Production:    gunicorn -c gunicorn.conf.py wsgi:application")
+        print("   With workers:  gunicorn --bind 0.0.0.0:5000 --workers 4 --threads 4 --worker-class gthread --preload wsgi:application")
         
         print("\n📚 Documentation:")
         print("   Full guide: PRODUCTION_DEPLOYMENT_GUIDE.md")
+        print("   Gunicorn config: gunicorn.conf.py")
         print("   Service file: trading-journal.service")
         print("   Nginx config: nginx-trading-journal.conf")
         
@@ -5,7 +5,7 @@ import sys
 import time
 import re
 import threading
-import requests
+import asyncio
 
 # Force development environment
 os.environ['FLASK_ENV'] = 'development'
@@ -16,20 +16,29 @@ if os.path.exists('.env.production'):
     print("Temporarily renaming .env.production to avoid conflicts...")
     os.rename('.env.production', '.env.production.backup')
 
-processes = []
+# Service name -> Popen, or None if it never came up
+processes = {}
 
 def install_python_dependencies():
     """Install Python dependencies for all services."""
     requirements_files = [
+        'requirements-run.txt',
         'journal/requirements.txt',
         'forex_data_service/requirements.txt'
     ]
     
+    # Installed one file at a time: the journal and forex_data_service pins
+    # conflict (Flask-SQLAlchemy, SQLAlchemy, flask-cors), so a combined
+    # `pip install -r a -r b` cannot resolve.
     for req_file in requirements_files:
         if os.path.exists(req_file):
             print(f"Installing dependencies from {req_file}...")
             try:
-                subprocess.run(['pip3', 'install', '-r', req_file], check=True)
+                subprocess.run(
+                    ['pip3', 'install', '--no-input', '--prefer-binary', '-r', req_file],
+                    check=True,
+                    env={**os.environ, 'PIP_DISABLE_PIP_VERSION_CHECK': '1'}
+                )
                 print(f"Dependencies from {req_file} installed successfully.")
             except subprocess.CalledProcessError as e:
                 print(f"Error installing dependencies from {req_file}: {e}")
@@ -39,11 +48,34 @@ def install_python_dependencies():
 
 def signal_handler(sig, frame):
     print('Stopping servers...')
-    for p in processes:
-        # Send SIGTERM to the process group to ensure all child processes are terminated
-        os.killpg(os.getpgid(p.pid), signal.SIGTERM)
+    for p in processes.values():
+        # Services that already exited had their group signalled when they
+        # were reaped, and their PID may since belong to another process
+        if p is None or p.returncode is not None:
+            continue
+        try:
+            # start_new_session made each service its own group leader, so
+            # SIGTERM the group to make sure all its children are terminated
+            os.killpg(p.pid, signal.SIGTERM)
+        except (ProcessLookupError, OSError):
+            pass
     sys.exit(0)
 
+def reap_children(sig, frame):
+    """Reap exited services so they don't linger as zombies."""
+    # Popen.poll() does a waitpid(pid, WNOHANG) and keeps the exit status,
+    # unlike a blind waitpid(-1), which would steal it from Popen.
+    for p in list(processes.values()):
+        if p is None or p.returncode is not None:
+            continue
+        if p.poll() is not None:
+            # Stop orphaned group members (e.g. vite/esbuild under npm) now,
+            # right after reaping, before the leader's PID can be recycled
+            try:
+                os.killpg(p.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
 signal.signal(signal.SIGINT, signal_handler)
 
 def build_frontend():
@@ -64,81 +96,209 @@ def setup_database():
         os.remove(db_file)
     
     print("Creating new database...")
+    # create_app() runs load_dotenv(), which would otherwise leak .env values
+    # (e.g. NODE_ENV=production) into every service spawned from os.environ
+    saved_environ = dict(os.environ)
     try:
-        subprocess.run(['python3', 'create_db.py'], check=True)
+        # Run create_db in-process instead of paying for a fresh interpreter
+        import create_db
+        create_db.setup_database()
         print("Database created successfully.")
-    except subprocess.CalledProcessError as e:
+    except (Exception, SystemExit) as e:
         print(f"Error creating database: {e}")
         sys.exit(1)
+    finally:
+        os.environ.clear()
+        os.environ.update(saved_environ)
+
+def _listening_pids_lsof(ports):
+    """Map PID -> ports it listens on, using a single lsof call."""
+    cmd = ['lsof', '-nP', '-sTCP:LISTEN', '-Fpn'] + [f'-iTCP:{port}' for port in sorted(ports)]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    found = {}
+    pid = None
+    for line in result.stdout.splitlines():
+        if line.startswith('p'):
+            pid = int(line[1:])
+        elif line.startswith('n') and pid is not None:
+            port = int(line.rsplit(':', 1)[-1])
+            if port in ports:
+                found.setdefault(pid, set()).add(port)
+    return found
 
-def kill_process_on_port(port):
+def _listening_pids_psutil(psutil, ports):
+    """Map PID -> ports it listens on, using psutil."""
     try:
-        # Find the process ID (PID) using the specified port
-        result = subprocess.run(['lsof', '-ti', f':{port}'], capture_output=True, text=True)
-        pids = result.stdout.strip().split('\n')
-        for pid in pids:
-            if pid:
-                print(f"Killing process {pid} on port {port}")
-                os.kill(int(pid), signal.SIGKILL)
+        conns = [(c.pid, c) for c in psutil.net_connections(kind='inet')]
+    except psutil.AccessDenied:
+        # macOS refuses the system-wide scan for non-root users, so fall
+        # back to the connections of each process we are allowed to inspect
+        conns = []
+        for proc in psutil.process_iter():
+            try:
+                get_connections = getattr(proc, 'net_connections', None) or proc.connections
+                conns.extend((proc.pid, c) for c in get_connections(kind='inet'))
+            except (psutil.AccessDenied, psutil.NoSuchProcess):
+                continue
+
+    found = {}
+    for pid, c in conns:
+        if pid and c.laddr and c.laddr.port in ports and c.status == psutil.CONN_LISTEN:
+            found.setdefault(pid, set()).add(c.laddr.port)
+    return found
+
+def kill_processes_on_ports(ports):
+    """Terminate anything listening on the given ports, escalating to SIGKILL."""
+    # psutil comes from requirements-run.txt, which is not installed yet on a
+    # fresh checkout, so fall back to lsof without it
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+
+    try:
+        pids = _listening_pids_psutil(psutil, ports) if psutil else _listening_pids_lsof(ports)
     except Exception as e:
-        print(f"Error killing process on port {port}: {e}")
+        print(f"Error listing processes on ports {sorted(ports)}: {e}")
+        return
 
-def wait_for_service(port, service_name, timeout=30):
-    """Wait for a service to be available on the specified port."""
-    print(f"Waiting for {service_name} to be available on port {port}...")
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        try:
-            response = requests.get(f'http://localhost:{port}/health', timeout=1)
-            if response.status_code == 200:
-                print(f"{service_name} is ready on port {port}")
-                return True
-        except:
-            pass
-        time.sleep(1)
-    print(f"Warning: {service_name} did not become available on port {port} within {timeout} seconds")
-    return False
+    for pid, held in pids.items():
+        print(f"Killing process {pid} on port(s) {', '.join(map(str, sorted(held)))}")
 
-def start_service_with_retry(service, max_retries=3):
-    """Start a service with retry logic."""
+    if psutil:
+        procs = []
+        for pid in pids:
+            try:
+                proc = psutil.Process(pid)
+                proc.terminate()
+                procs.append(proc)
+            except psutil.NoSuchProcess:
+                pass
+
+        # Give them 200ms to exit cleanly before forcing it
+        _, alive = psutil.wait_procs(procs, timeout=0.2)
+        for proc in alive:
+            try:
+                proc.kill()
+            except psutil.NoSuchProcess:
+                pass
+    else:
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        if pids:
+            time.sleep(0.2)
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+async def wait_for_services(services_to_check, timeout=30):
+    """Probe several services concurrently over one shared keep-alive session."""
+    # Imported here: aiohttp comes from requirements-run.txt, which is only
+    # installed once install_python_dependencies() has run
+    import aiohttp
+
+    async def probe(session, port, service_name):
+        """Poll a service's /health endpoint with exponential backoff until it responds."""
+        print(f"Waiting for {service_name} to be available on port {port}...")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        attempt = 0
+        while loop.time() < deadline:
+            try:
+                async with session.get(f'http://localhost:{port}/health') as response:
+                    if response.status == 200:
+                        print(f"{service_name} is ready on port {port}")
+                        return True
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                pass
+            await asyncio.sleep(min(1.0, 0.05 * 2 ** attempt))
+            attempt += 1
+        print(f"Warning: {service_name} did not become available on port {port} within {timeout} seconds")
+        return False
+
+    connector = aiohttp.TCPConnector(limit=20, limit_per_host=8)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=0.5)) as session:
+        return await asyncio.gather(
+            *[probe(session, s['port'], s['name']) for s in services_to_check]
+        )
+
+def service_log_path(service):
+    return os.path.join('logs', f"{service['name']}.log")
+
+def spawn_service(service):
+    """Launch a service in its own session without waiting for it."""
+    print(f"Starting {service['name']} service...")
+    os.makedirs('logs', exist_ok=True)
+    # The child writes straight to its log file, so a full pipe can never block it;
+    # the parent's copy of the descriptor is closed as soon as Popen returns.
+    with open(service_log_path(service), 'ab', buffering=0) as log:
+        return subprocess.Popen(
+            service["command"],
+            shell=False,
+            env={**os.environ, **service.get("env", {})},
+            start_new_session=True,
+            cwd=service["cwd"],
+            stdout=log,
+            stderr=subprocess.STDOUT
+        )
+
+def start_services_with_retry(services, max_retries=3):
+    """Spawn all services back to back, then retry only the ones that died."""
+    started = []
+    pending = list(services)
     for attempt in range(max_retries):
-        try:
-            print(f"Starting {service['name']} service (attempt {attempt + 1}/{max_retries})...")
-            pro = subprocess.Popen(
-                service["command"],
-                shell=True,
-                preexec_fn=os.setsid,
-                cwd=service["cwd"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                universal_newlines=True
-            )
-            
-            # Give the process a moment to start
-            time.sleep(2)
-            
-            # Check if process is still running
+        launched = []
+        failed = []
+        for service in pending:
+            # Remember where this attempt's output starts in the append-only log
+            log_path = service_log_path(service)
+            log_offset = os.path.getsize(log_path) if os.path.exists(log_path) else 0
+            try:
+                launched.append((service, spawn_service(service), log_offset))
+            except Exception as e:
+                print(f"Error starting {service['name']} service (attempt {attempt + 1}): {e}")
+                failed.append(service)
+        
+        # Give the whole batch a moment to start
+        time.sleep(2)
+        
+        # Check which processes are still running
+        for service, pro, log_offset in launched:
             if pro.poll() is None:
                 print(f"{service['name']} started successfully")
-                return pro
+                started.append((service, pro))
             else:
-                # Process died, read output for debugging
-                output, _ = pro.communicate()
+                # Process died; stop whatever it left behind in its group
+                try:
+                    os.killpg(pro.pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+                # Show the end of this attempt's output for debugging
+                with open(service_log_path(service), 'rb') as log:
+                    log.seek(0, os.SEEK_END)
+                    log.seek(max(log_offset, log.tell() - 4096))
+                    output = log.read().decode(errors='replace')
                 print(f"{service['name']} failed to start. Output: {output}")
-                
-        except Exception as e:
-            print(f"Error starting {service['name']} service (attempt {attempt + 1}): {e}")
-            
+                failed.append(service)
+        
+        pending = failed
+        if not pending:
+            break
         if attempt < max_retries - 1:
-            print(f"Retrying {service['name']} in 3 seconds...")
+            print(f"Retrying {', '.join(s['name'] for s in pending)} in 3 seconds...")
             time.sleep(3)
     
-    print(f"Failed to start {service['name']} after {max_retries} attempts")
-    return None
+    for service in pending:
+        print(f"Failed to start {service['name']} after {max_retries} attempts")
+    return started
 
 # Kill existing services before setting up the database
-for port in [5005, 5007, 5000, 5175]:
-    kill_process_on_port(port)
+kill_processes_on_ports({5000, 5005, 5008, 5010, 5175})
 
 # Install Python dependencies first
 install_python_dependencies()
@@ -152,55 +312,58 @@ setup_database()
 services = [
     {
         "name": "journal_service",
-        "command": "PYTHONPATH=. python3 journal/run_journal.py",
+        "command": ["python3", "journal/run_journal.py"],
+        "env": {"PYTHONPATH": "."},
         "cwd": ".",
         "port": 5000
     },
     {
         "name": "forex_data_service",
-        "command": "python3 forex_data_service/server.py",
+        "command": ["python3", "forex_data_service/server.py"],
         "cwd": ".",
         "port": 5010
     },
     {
         "name": "frontend",
-        "command": "npm run dev",
+        "command": ["npm", "run", "dev"],
         "cwd": ".",
         "port": 5175
     },
     {
         "name": "customer_service",
-        "command": "node customer-service/server.js",
+        "command": ["node", "customer-service/server.js"],
         "cwd": ".",
         "port": 5005
     },
     {
         "name": "trade_mentor_service",
-        "command": "node trade_mentor_service/server.js",
+        "command": ["node", "trade_mentor_service/server.js"],
         "cwd": ".",
         "port": 5008
     }
 ]
 
+# Installed only now, so the setup steps' subprocess.run calls keep their exit codes
+signal.signal(signal.SIGCHLD, reap_children)
+
 # Start services with proper error handling and health checks
+processes.update((service['name'], None) for service in services)
+for service, pro in start_services_with_retry(services):
+    processes[service['name']] = pro
 for service in services:
-    pro = start_service_with_retry(service)
-    if pro:
-        processes.append(pro)
-        
-        # Wait for critical services to be ready
-        if service['name'] in ['journal_service']:
-            wait_for_service(service['port'], service['name'])
-    else:
+    if processes[service['name']] is None:
         print(f"Critical service {service['name']} failed to start. Continuing with other services...")
 
+# Wait for critical services to be ready
+asyncio.run(wait_for_services([s for s in services if s['name'] in ['journal_service'] and processes[s['name']]]))
+
 print("All services started.")
 print("Services status:")
-for i, service in enumerate(services):
-    if i < len(processes) and processes[i].poll() is None:
-        print(f"  ✓ {service['name']} - Running")
+for name, p in processes.items():
+    if p is not None and p.poll() is None:
+        print(f"  ✓ {name} - Running")
     else:
-        print(f"  ✗ {service['name']} - Not running")
+        print(f"  ✗ {name} - Not running")
 
 # Keep the main script alive to manage child processes
 try:
@@ -3,12 +3,9 @@
 Production runner for Trading Journal Flask App
 """
 import os
-import sys
 from pathlib import Path
 
-# Add the project directory to Python path
-project_dir = Path(__file__).parent
-sys.path.insert(0, str(project_dir))
+project_dir = Path(__file__).resolve().parent
 
 # Load environment variables
 from dotenv import load_dotenv
@@ -17,14 +14,22 @@ load_dotenv('.env')
 # Set Flask environment
 os.environ['FLASK_ENV'] = 'production'
 
-# Import and run the application
-from journal import create_production_app
-
-app = create_production_app()
-
 if __name__ == "__main__":
     print("🚀 Starting Trading Journal in Production Mode...")
     print("📊 Dashboard will be available at: http://localhost:5000")
     print("🔐 Admin MPIN: 180623")
     print("⚡ Press Ctrl+C to stop the server")
-    app.run(host='0.0.0.0', port=5000, debug=False)
+
+    # Replace this process with Gunicorn. Workers, threads, preload and the
+    # post_fork hook all come from gunicorn.conf.py; it is passed explicitly
+    # because Gunicorn only auto-loads it from the launch directory.
+    # Gunicorn imports wsgi:application itself, so nothing is built here and
+    # no idle Python parent is left behind.
+    argv = [
+        "gunicorn",
+        "-c", str(project_dir / "gunicorn.conf.py"),
+        "--chdir", str(project_dir),
+        "--bind", "0.0.0.0:5000",
+        "wsgi:application",
+    ]
+    os.execvp(argv[0], argv)